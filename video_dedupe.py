@@ -6,10 +6,15 @@ filename parsing & global hotkey (Ctrl+Shift+P / ⌘+⇧+P).
 
 import sys
 import os
-import re
 import threading
 import subprocess
+import pickle
+import mmap
+import struct
+import base64
+import binascii
 import cv2
+import numpy as np
 import pythoncom  # PyWin32 COM initializer
 import win32gui  # PyWin32 GUI utilities
 import win32com.client  # PyWin32 COM client
@@ -18,83 +23,186 @@ import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
 
+# PyObjC (opcional, só macOS): consulta o Finder sem iniciar o osascript
+SBApplication = None
+if sys.platform == "darwin":
+    try:
+        from Foundation import NSURL
+        from ScriptingBridge import SBApplication
+    except ImportError:
+        pass
+
 # ————— CONFIGURATION —————
 GRID = 4  # 4×4 grid → 16 sample points
+# as amostras são lidas na resolução nativa do vídeo: o VideoCapture não
+# reduz a escala na decodificação de arquivos, e amostrar um frame reduzido
+# mudaria as assinaturas já gravadas.
 VIDEO_WIDTH = 1920
 VIDEO_HEIGHT = 1080
-RECORD_FILE = "processed_videos.txt"
-# regex to parse "2025-05-07_08-22-55 1132 (channel) Title text"
-NAME_PATTERN = re.compile(
-    r"^(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\s+"
-    r"(\d+)\s*"
-    r"(?:\([^\)]*\))?\s*"
-    r"(.*)$"
-)
+# diferença máxima por canal (0–255) para considerar duas assinaturas iguais
+COLOR_TOLERANCE = 6
+# log binário só de acréscimo: RECORD_MAGIC + registros
+# (len(fn): u16, len(data): u8, fn UTF-8, data UTF-8, assinatura de 48 bytes)
+RECORD_FILE = "processed_videos.bin"
+RECORD_MAGIC = b"VSDD\x01"
+RECORD_HEADER = struct.Struct("<HB")
+KEY_SIZE = 48  # RGB × 16 pontos
+# log texto antigo ("fn|assinatura|data"), migrado para RECORD_FILE na 1ª execução
+LEGACY_RECORD_FILE = "processed_videos.txt"
+# índices dos registros já montados, válidos enquanto RECORD_FILE não mudar
+CACHE_FILE = "processed_videos.cache.pkl"
+CACHE_VERSION = 3
+# names look like "2025-05-07_08-22-55 1132 (channel) Title text";
+# date-time prefix template ('0' = digit)
+DATE_TEMPLATE = "0000-00-00_00-00-00"
 # build the GRID×GRID sample coordinates
 POSITIONS = [
     (int((i + 1) * VIDEO_WIDTH / (GRID + 1)), int((j + 1) * VIDEO_HEIGHT / (GRID + 1)))
     for j in range(GRID)
     for i in range(GRID)
 ]
+# coordenadas em arrays para amostrar todos os pontos de uma vez
+XS = np.fromiter((x for x, _ in POSITIONS), dtype=np.int32)
+YS = np.fromiter((y for _, y in POSITIONS), dtype=np.int32)
 # ————————————————————————
 
+# root Tk única e oculta, criada na thread principal (que roda o mainloop)
+_TK_ROOT = tk.Tk()
+_TK_ROOT.withdraw()
+
 
 def alert_info(title, msg):
-    """Caixa de mensagem informativa."""
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showinfo(title, msg)
-    root.destroy()
+    """Caixa de mensagem informativa (agendada na thread do Tk)."""
+    _TK_ROOT.after(0, lambda: messagebox.showinfo(title, msg, parent=_TK_ROOT))
 
 
 def alert_warn(title, msg):
-    """Caixa de mensagem de alerta."""
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showwarning(title, msg)
-    root.destroy()
+    """Caixa de mensagem de alerta (agendada na thread do Tk)."""
+    _TK_ROOT.after(0, lambda: messagebox.showwarning(title, msg, parent=_TK_ROOT))
 
 
 def parse_name_parts(filename):
     """Extrai (date_time, code, text) de acordo com o padrão."""
     base = os.path.splitext(filename)[0]
-    m = NAME_PATTERN.match(base)
-    if m:
-        date_part = m.group(1)
-        code_part = m.group(2)
-        text_part = m.group(3).strip()
-        return date_part, code_part, text_part
+    date_part = base[: len(DATE_TEMPLATE)]
+    if len(date_part) == len(DATE_TEMPLATE) and all(
+        c.isdecimal() if t == "0" else c == t for c, t in zip(date_part, DATE_TEMPLATE)
+    ):
+        rest = base[len(DATE_TEMPLATE) :]
+        tail = rest.lstrip()
+        i = 0
+        while i < len(tail) and tail[i].isdecimal():
+            i += 1
+        # exige espaço após a data e um código numérico
+        if len(tail) < len(rest) and i > 0:
+            code_part = tail[:i]
+            text_part = tail[i:].lstrip()
+            if text_part.startswith("("):  # "(channel)" opcional
+                j = text_part.find(")")
+                if j >= 0:
+                    text_part = text_part[j + 1 :].lstrip()
+            if "\n" not in text_part[:-1]:  # título em uma única linha
+                return date_part, code_part, text_part.strip()
     return None, None, base
 
 
+def sample_key(frame):
+    """
+    Amostra os pontos POSITIONS de um frame BGR e retorna a assinatura
+    binária: RGB dos 16 pontos (48 bytes), com preto nos pontos fora do frame.
+    """
+    h, w = frame.shape[:2]
+    in_bounds = (XS < w) & (YS < h)
+    px = frame[np.where(in_bounds, YS, 0), np.where(in_bounds, XS, 0)]
+    px[~in_bounds] = 0
+    # inverte só os 16 pixels amostrados (BGR → RGB) em vez de converter o frame
+    return px[:, ::-1].tobytes()
+
+
+# estado COM por thread: o COM exige CoInitialize e objetos no mesmo apartment
+_COM = threading.local()
+
+
+def get_shell():
+    """Retorna o Shell.Application da thread atual, criado uma única vez."""
+    shell = getattr(_COM, "shell", None)
+    if shell is None:
+        if not getattr(_COM, "initialized", False):
+            pythoncom.CoInitialize()  # inicializa o COM nesta thread
+            _COM.initialized = True
+        shell = _COM.shell = win32com.client.Dispatch("Shell.Application")
+    return shell
+
+
+def explorer_windows():
+    """
+    Mapeia hwnd → janelas do Explorer abertas, via Shell.Application. Uma lista
+    por hwnd: as abas do Explorer (Windows 11) compartilham o hwnd da janela.
+    """
+    try:
+        windows = get_shell().Windows()
+    except pythoncom.com_error:
+        _COM.shell = None  # objeto COM inválido → recria
+        windows = get_shell().Windows()
+
+    by_hwnd = {}
+    for i in range(windows.Count):
+        try:
+            window = windows.Item(i)
+            by_hwnd.setdefault(window.HWND, []).append(window)
+        except Exception:
+            continue
+    return by_hwnd
+
+
+_FINDER = None  # SBApplication do Finder, criado uma única vez
+
+
+def get_finder():
+    """Retorna o objeto ScriptingBridge do Finder (macOS, requer PyObjC)."""
+    global _FINDER
+    if _FINDER is None:
+        _FINDER = SBApplication.applicationWithBundleIdentifier_("com.apple.finder")
+    return _FINDER
+
+
 def get_selected_file():
     """
     Retorna o único arquivo selecionado no Explorer (Windows) ou Finder (macOS).
     """
     # --- Windows ---
     if sys.platform.startswith("win"):
-        # inicializa o COM nesta thread
-        pythoncom.CoInitialize()
-        try:
-            shell = win32com.client.Dispatch("Shell.Application")
-            windows = shell.Windows()
-            hwnd_active = win32gui.GetForegroundWindow()
-
-            for i in range(windows.Count):
-                window = windows.Item(i)
+        hwnd_active = win32gui.GetForegroundWindow()
+        # consulta o mapa hwnd → janelas em cache; só reenumera as janelas do
+        # Explorer se nenhuma aba em cache da janela ativa tiver uma seleção única
+        by_hwnd = getattr(_COM, "windows", None)
+        fresh = by_hwnd is None
+        if fresh:
+            by_hwnd = _COM.windows = explorer_windows()
+        while True:
+            for window in by_hwnd.get(hwnd_active, ()):
                 try:
-                    if window.HWND == hwnd_active:
-                        sel = window.Document.SelectedItems()
-                        if sel.Count == 1:
-                            return sel.Item(0).Path
+                    sel = window.Document.SelectedItems()
+                    if sel.Count == 1:
+                        return sel.Item(0).Path
                 except Exception:
-                    continue
-        finally:
-            pythoncom.CoUninitialize()
-        return None
+                    continue  # objeto COM de janela/aba já fechada
+            if fresh:
+                return None
+            by_hwnd = _COM.windows = explorer_windows()
+            fresh = True
 
     # --- macOS ---
     elif sys.platform == "darwin":
+        if SBApplication is not None:
+            try:
+                sel = get_finder().selection().get()
+                if not sel:
+                    return None
+                return NSURL.URLWithString_(sel[0].URL()).path()
+            except Exception:
+                pass  # falhou via ScriptingBridge → tenta o osascript
+
         applescript = """
         tell application "Finder"
           set sel to selection as alias list
@@ -114,109 +222,420 @@ def get_selected_file():
         return None
 
 
-def process_video(path):
-    """Faz todos os checks (nome + cor) e registra o vídeo se for novo."""
-    fn = os.path.basename(path)
-    date_cur, code_cur, text_cur = parse_name_parts(fn)
+def decode_key(text):
+    """Assinatura do log texto (base64 ou o antigo "#RRGGBB,...") → bytes."""
+    if text.startswith("#"):
+        return bytes.fromhex(text.replace("#", "").replace(",", ""))
+    return base64.b64decode(text, validate=True)
+
+
+def encode_record(rec_fn, rec_key, rec_date):
+    """Serializa um registro no formato binário de RECORD_FILE."""
+    fn_b = rec_fn.encode("utf-8")
+    date_b = rec_date.encode("utf-8")[:255]
+    return RECORD_HEADER.pack(len(fn_b), len(date_b)) + fn_b + date_b + rec_key
+
+
+def load_records():
+    """
+    Lê RECORD_FILE e retorna [(rec_fn, rec_key, rec_date, partes do nome)].
+    Um registro incompleto no fim (gravação interrompida) é removido do arquivo,
+    para que o próximo registro não seja gravado emendado nele.
+    """
+    records = []
+    with mmap.mmap(get_record_handle().fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[: len(RECORD_MAGIC)] != RECORD_MAGIC:
+            raise ValueError(f"'{RECORD_FILE}' não é um arquivo de registros válido.")
+        end = len(mm)
+        pos = good_end = len(RECORD_MAGIC)
+        while pos + RECORD_HEADER.size <= end:
+            fn_len, date_len = RECORD_HEADER.unpack_from(mm, pos)
+            pos += RECORD_HEADER.size
+            stop = pos + fn_len + date_len + KEY_SIZE
+            if stop > end:
+                break  # registro truncado (gravação interrompida)
+            rec_fn = mm[pos : pos + fn_len].decode("utf-8", "replace")
+            pos += fn_len
+            rec_date = mm[pos : pos + date_len].decode("utf-8", "replace")
+            rec_key = mm[pos + date_len : stop]
+            pos = good_end = stop
+
+            # nome já decomposto uma única vez por registro
+            records.append((rec_fn, rec_key, rec_date, parse_name_parts(rec_fn)))
+
+    # trunca só depois de fechar o mmap (o Windows não trunca arquivo mapeado)
+    if good_end < end:
+        fh = get_record_handle()
+        fh.truncate(good_end)
+        os.fsync(fh.fileno())
+    return records
 
-    # carrega registros existentes
+
+def load_legacy_records():
+    """Lê LEGACY_RECORD_FILE e retorna [(rec_fn, rec_key, rec_date, partes do nome)]."""
     records = []
-    if os.path.exists(RECORD_FILE):
-        with open(RECORD_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue  # ignora linha em branco
-                parts = line.split('|')
-                if len(parts) == 3:
-                    rec_fn, rec_key, rec_date = parts
-                elif len(parts) == 2:
-                    rec_fn, rec_key = parts
-                    rec_date = "data desconhecida"
-                else:
-                    continue  # ignora linha malformada
-
-                records.append((rec_fn, rec_key, rec_date))
+    if not os.path.exists(LEGACY_RECORD_FILE) or os.path.getsize(LEGACY_RECORD_FILE) == 0:
+        return records  # mmap não aceita arquivo vazio
 
+    # varre o arquivo mapeado em bytes, sem criar um objeto str por linha
+    with open(LEGACY_RECORD_FILE, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        end = len(mm)
+        i = 0
+        while i < end:
+            k = mm.find(b"\n", i)
+            if k < 0:
+                k = end
+            line = mm[i:k].strip()
+            i = k + 1
+            if not line:
+                continue  # ignora linha em branco
+            parts = line.split(b"|")
+            if len(parts) == 3:
+                rec_fn, rec_key, rec_date = parts
+            elif len(parts) == 2:
+                rec_fn, rec_key = parts
+                rec_date = "data desconhecida".encode("utf-8")
+            else:
+                continue  # ignora linha malformada
+            try:
+                rec_fn = rec_fn.decode("utf-8")
+                rec_date = rec_date.decode("utf-8")
+                rec_key = decode_key(rec_key.decode("ascii"))
+            except (ValueError, binascii.Error):
+                continue  # ignora texto ou assinatura malformada
+            if len(rec_key) != KEY_SIZE:
+                continue  # ignora assinatura de tamanho inesperado
 
-    # 1) filename exato?
-    for rec_fn, _, rec_date in records:
-        if rec_fn == fn:
-            alert_warn(
-                "Duplicate Filename",
-                f"Vídeo DUPLICADO\n\n'{fn}' já está registrado.\n\nRegistrado em:  {rec_date}.",
-            )
+            # nome já decomposto uma única vez por registro
+            records.append((rec_fn, rec_key, rec_date, parse_name_parts(rec_fn)))
+    return records
+
+
+def migrate_legacy_records():
+    """
+    Converte LEGACY_RECORD_FILE para RECORD_FILE se este ainda não existir.
+    O arquivo texto é mantido como está. Retorna True se houve migração.
+    """
+    if os.path.exists(RECORD_FILE) or not os.path.exists(LEGACY_RECORD_FILE):
+        return False
+    tmp = RECORD_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(RECORD_MAGIC)
+        for rec_fn, rec_key, rec_date, _ in load_legacy_records():
+            f.write(encode_record(rec_fn, rec_key, rec_date))
+    os.replace(tmp, RECORD_FILE)
+    return True
+
+
+_REC_FH = None  # handle de RECORD_FILE aberto durante toda a sessão
+
+
+def get_record_handle():
+    """
+    Abre RECORD_FILE uma única vez (leitura + acréscimo), migrando o log texto
+    antigo antes e gravando o cabeçalho se o arquivo for novo.
+    """
+    global _REC_FH
+    if _REC_FH is None:
+        migrate_legacy_records()
+        _REC_FH = open(RECORD_FILE, "a+b")
+        if os.fstat(_REC_FH.fileno()).st_size == 0:
+            append_record(RECORD_MAGIC)
+    return _REC_FH
+
+
+def check_record_handle():
+    """
+    Fecha o handle de RECORD_FILE se o arquivo foi substituído ou removido por
+    fora desde a abertura; o próximo get_record_handle() abre o arquivo atual.
+    """
+    if _REC_FH is None:
+        return
+    try:
+        st = os.stat(RECORD_FILE)
+    except FileNotFoundError:
+        st = None
+    fst = os.fstat(_REC_FH.fileno())
+    if st is None or (st.st_dev, st.st_ino) != (fst.st_dev, fst.st_ino):
+        close_record_handle()
+
+
+def close_record_handle():
+    """Fecha o handle de RECORD_FILE (reaberto no próximo get_record_handle())."""
+    global _REC_FH
+    if _REC_FH is not None:
+        _REC_FH.close()
+        _REC_FH = None
+
+
+def append_record(data):
+    """Acrescenta bytes a RECORD_FILE e força a gravação em disco."""
+    fh = get_record_handle()
+    fh.write(data)
+    fh.flush()
+    os.fsync(fh.fileno())
+
+
+def color_distance(key_a, key_b):
+    """Maior diferença entre canais correspondentes de duas assinaturas."""
+    return max(abs(a - b) for a, b in zip(key_a, key_b))
+
+
+def bk_add(tree, key):
+    """
+    Insere uma assinatura na BK-tree. A árvore é uma lista plana de nós
+    (key, {distância: índice do filho}), com a raiz no índice 0.
+    """
+    if not tree:
+        tree.append((key, {}))
+        return
+    i = 0
+    while True:
+        node_key, children = tree[i]
+        d = color_distance(key, node_key)
+        if d == 0:
+            return
+        if d not in children:
+            children[d] = len(tree)
+            tree.append((key, {}))
             return
+        i = children[d]
+
+
+def bk_find(tree, key, tolerance):
+    """Retorna uma assinatura da BK-tree a até `tolerance` de key, ou None."""
+    stack = [0] if tree else []
+    while stack:
+        node_key, children = tree[stack.pop()]
+        d = color_distance(key, node_key)
+        if d <= tolerance:
+            return node_key
+        # desigualdade triangular: só filhos em [d - tol, d + tol] podem servir
+        for dist, child in children.items():
+            if d - tolerance <= dist <= d + tolerance:
+                stack.append(child)
+    return None
+
+
+def add_to_index(index, rec_fn, rec_key, rec_date, name_parts):
+    """Insere um registro nos índices, mantendo o primeiro registro de cada valor."""
+    fn_idx, date_idx, code_idx, title_idx, key_idx, key_tree = index
+    date_rec, code_rec, text_rec = name_parts
+    rec = (rec_fn, rec_date)
+    fn_idx.setdefault(rec_fn, rec)
+    if rec_key not in key_idx:
+        key_idx[rec_key] = rec
+        bk_add(key_tree, rec_key)
+    if date_rec:
+        date_idx.setdefault(date_rec, rec)
+    if code_rec:
+        code_idx.setdefault(code_rec, rec)
+    if text_rec:
+        title_idx.setdefault(text_rec.lower(), rec)
+
+
+def build_index(records):
+    """
+    Monta os índices (filename, date-time, código, título, cores) dos registros.
+    Cada índice mapeia o valor → (rec_fn, rec_date) do primeiro registro que o usa;
+    o último item é a BK-tree das assinaturas, para a busca por cores próximas.
+    """
+    index = ({}, {}, {}, {}, {}, [])
+    for record in records:
+        add_to_index(index, *record)
+    return index
+
+
+def record_stamp():
+    """Identifica a versão atual de RECORD_FILE (mtime + tamanho)."""
+    st = os.fstat(get_record_handle().fileno())
+    return st.st_mtime_ns, st.st_size
+
+
+def save_index_cache(index, stamp):
+    """Grava os índices em CACHE_FILE, associados ao stamp de RECORD_FILE que refletem."""
+    tmp = CACHE_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump((CACHE_VERSION, stamp, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, CACHE_FILE)
+
+
+# índices mantidos entre hotkeys: (stamp de RECORD_FILE, índices)
+_INDEX = None
+_INDEX_DIRTY = False  # registros novos ainda não gravados em CACHE_FILE
+_INDEX_LOCK = threading.Lock()  # serializa check + gravação de registros
+
+
+def load_index():
+    """
+    Carrega os índices do cache; se estiver desatualizado, relê RECORD_FILE.
+    Retorna (stamp de RECORD_FILE, índices).
+    """
+    stamp = record_stamp()
+    try:
+        with open(CACHE_FILE, "rb") as f:
+            version, cached_stamp, index = pickle.load(f)
+        if version == CACHE_VERSION and cached_stamp == stamp:
+            return stamp, index
+    except Exception:
+        pass  # cache ausente ou corrompido → reconstrói
+
+    index = build_index(load_records())
+    stamp = record_stamp()  # load_records() pode ter truncado um registro incompleto
+    save_index_cache(index, stamp)
+    return stamp, index
+
+
+def get_index():
+    """Índices da sessão; só recarrega se RECORD_FILE foi alterado por fora."""
+    global _INDEX, _INDEX_DIRTY
+    check_record_handle()
+    if _INDEX is None or _INDEX[0] != record_stamp():
+        _INDEX = load_index()
+        _INDEX_DIRTY = False
+    return _INDEX[1]
+
+
+def update_index(index):
+    """Atualiza o stamp dos índices da sessão após um novo registro (só em memória)."""
+    global _INDEX, _INDEX_DIRTY
+    _INDEX = (record_stamp(), index)
+    _INDEX_DIRTY = True
+
+
+def save_session_index():
+    """Grava em CACHE_FILE os índices da sessão, se houve registros novos (ao sair)."""
+    with _INDEX_LOCK:
+        if _INDEX is not None and _INDEX_DIRTY:
+            stamp, index = _INDEX
+            save_index_cache(index, stamp)
+
+
+def find_name_duplicate(index, fn, name_parts):
+    """
+    Checa o nome contra os índices, na ordem filename → date-time → código → título.
+    Retorna (título, mensagem) do alerta de duplicado, ou None.
+    """
+    fn_idx, date_idx, code_idx, title_idx, _, _ = index
+    date_cur, code_cur, text_cur = name_parts
+
+    # 1) filename exato?
+    if fn in fn_idx:
+        _, rec_date = fn_idx[fn]
+        return (
+            "Duplicate Filename",
+            f"Vídeo DUPLICADO\n\n'{fn}' já está registrado.\n\nRegistrado em:  {rec_date}.",
+        )
 
     # 2) date-time?
-    if date_cur:
-        for rec_fn, _, rec_date in records:
-            date_rec, _, _ = parse_name_parts(rec_fn)
-            if date_rec == date_cur:
-                alert_warn(
-                    "Duplicate Date-Time",
-                    f"Vídeo DUPLICADO\n\nDate/time '{date_cur}' já usado.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
-                )
-                return
+    if date_cur and date_cur in date_idx:
+        rec_fn, rec_date = date_idx[date_cur]
+        return (
+            "Duplicate Date-Time",
+            f"Vídeo DUPLICADO\n\nDate/time '{date_cur}' já usado.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+        )
 
     # 3) numeric code?
-    if code_cur:
-        for rec_fn, _, rec_date in records:
-            _, code_rec, _ = parse_name_parts(rec_fn)
-            if code_rec == code_cur:
-                alert_warn(
-                    "Duplicate Code",
-                    f"Vídeo DUPLICADO\n\nCódigo '{code_cur}' já usado.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
-                )
-                return
+    if code_cur and code_cur in code_idx:
+        rec_fn, rec_date = code_idx[code_cur]
+        return (
+            "Duplicate Code",
+            f"Vídeo DUPLICADO\n\nCódigo '{code_cur}' já usado.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+        )
 
     # 4) title text?
-    if text_cur:
-        for rec_fn, _, rec_date in records:
-            _, _, text_rec = parse_name_parts(rec_fn)
-            if text_rec and text_rec.lower() == text_cur.lower():
-                alert_warn(
-                    "Duplicate Title",
-                    f"Vídeo DUPLICADO\n\nTítulo já usado no registro abaixo.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
-                )
-                return
-
-    # 5) captura e amostra cores
-    cap = cv2.VideoCapture(path)
-    ok, frame = cap.read()
-    cap.release()
-    if not ok:
-        alert_warn("Read Error", f"Não foi possível ler '{fn}'.")
-        return
+    if text_cur and text_cur.lower() in title_idx:
+        rec_fn, rec_date = title_idx[text_cur.lower()]
+        return (
+            "Duplicate Title",
+            f"Vídeo DUPLICADO\n\nTítulo já usado no registro abaixo.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+        )
+    return None
+
+
+def find_color_duplicate(index, key):
+    """
+    Checa a assinatura de cores (idêntica ou a até COLOR_TOLERANCE por canal).
+    Retorna (título, mensagem) do alerta de duplicado, ou None.
+    """
+    _, _, _, _, key_idx, key_tree = index
+
+    if key in key_idx:
+        rec_fn, rec_date = key_idx[key]
+        return (
+            "Duplicate Colors",
+            f"Vídeo DUPLICADO\n\nAssinatura de cores já registrada.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+        )
+    near_key = bk_find(key_tree, key, COLOR_TOLERANCE)
+    if near_key is not None:
+        rec_fn, rec_date = key_idx[near_key]
+        return (
+            "Similar Colors",
+            f"Vídeo DUPLICADO\n\nAssinatura de cores quase idêntica já registrada.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+        )
+    return None
+
+
+def process_video(path):
+    """Faz todos os checks (nome + cor) e registra o vídeo se for novo."""
+    with _INDEX_LOCK:
+        fn = os.path.basename(path)
+        name_parts = parse_name_parts(fn)
 
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    h, w, _ = frame_rgb.shape
-    colors = []
-    for x, y in POSITIONS:
-        if 0 <= x < w and 0 <= y < h:
-            r, g, b = frame_rgb[y, x]
-            colors.append(f"#{r:02X}{g:02X}{b:02X}")
-        else:
-            colors.append("#000000")
-    key = ",".join(colors)
-
-    # 6) cor duplicada?
-    for rec_fn, rec_key, rec_date in records:
-        if rec_key == key:
+        # índices dos registros existentes (carregados uma vez por sessão)
+        try:
+            index = get_index()
+        except ValueError as e:  # cabeçalho de RECORD_FILE inválido
+            close_record_handle()  # libera o arquivo para ser renomeado (Windows)
             alert_warn(
-                "Duplicate Colors",
-                f"Vídeo DUPLICADO\n\nAssinatura de cores já registrada.\n\n'{rec_fn}'\n\nRegistrado em: {rec_date}.",
+                "Record File Error",
+                f"{e}\n\nRenomeie ou remova '{os.path.abspath(RECORD_FILE)}' "
+                "para iniciar um novo registro.",
             )
             return
 
-    # 7) tudo ok → grava registro com data atual
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(RECORD_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{fn}|{key}|{now}\n\n")
+        # 1–4) filename, date-time, código e título, antes de abrir o vídeo
+        dup = find_name_duplicate(index, fn, name_parts)
+        if dup:
+            alert_warn(*dup)
+            return
 
-    alert_info(
-        "Done", f"Vídeo NÃO duplicado\n\n'{fn}' processado e registrado em {now}."
-    )
+        # 5) captura e amostra cores
+        # backend FFmpeg com decodificação por hardware quando disponível
+        cap = cv2.VideoCapture(
+            path,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+        if not cap.isOpened():
+            cap = cv2.VideoCapture(path)  # fallback: backend padrão
+        ok = cap.grab()
+        if ok:
+            ok, frame = cap.retrieve()
+        cap.release()
+        if not ok:
+            alert_warn("Read Error", f"Não foi possível ler '{fn}'.")
+            return
+
+        key = sample_key(frame)
+
+        # 6) cor duplicada?
+        dup = find_color_duplicate(index, key)
+        if dup:
+            alert_warn(*dup)
+            return
+
+        # 7) tudo ok → grava registro com data atual
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        append_record(encode_record(fn, key, now))
+        add_to_index(index, fn, key, now, name_parts)
+        update_index(index)
+
+        alert_info(
+            "Done", f"Vídeo NÃO duplicado\n\n'{fn}' processado e registrado em {now}."
+        )
 
 
 def on_activate():
@@ -233,5 +652,9 @@ if __name__ == "__main__":
     # define hotkey cross-platform
     hotkey = "<f7>"
     print(f"Listening for {hotkey} … (select a video in Explorer/Finder and press it)")
-    with keyboard.GlobalHotKeys({hotkey: on_activate}) as listener:
-        listener.join()
+    # o listener roda em thread própria; a principal fica com o mainloop do Tk
+    try:
+        with keyboard.GlobalHotKeys({hotkey: on_activate}):
+            _TK_ROOT.mainloop()
+    finally:
+        save_session_index()